@@ -5,7 +5,6 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 import os
-import json
 from .db import SessionLocal
 from . import models
 
@@ -15,6 +14,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 SECRET_KEY = os.environ.get('JWT_SECRET', 'devsecret')
 ALGORITHM = 'HS256'
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
+# comma-separated usernames allowed to call /admin/* endpoints; empty = nobody
+ADMIN_USERNAMES = {u.strip() for u in os.environ.get('ADMIN_USERNAMES', '').split(',') if u.strip()}
 
 
 def get_db():
@@ -72,9 +73,15 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     return user
 
 
+def get_current_admin(current_user = Depends(get_current_user)):
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='admin only')
+    return current_user
+
+
 def create_user(db: Session, username: str, password: str, prefs: dict = None):
     hashed = get_password_hash(password)
-    u = models.User(username=username, hashed_password=hashed, prefs=json.dumps(prefs or {}))
+    u = models.User(username=username, hashed_password=hashed, prefs=prefs or {})
     db.add(u)
     db.commit()
     db.refresh(u)
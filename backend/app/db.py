@@ -1,14 +1,37 @@
 from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import orjson
 
 DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///./dev.db')
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith('sqlite') else {})
+def _json_loads(value):
+    # a bad stored value (e.g. legacy free-text prefs) must not break loading the
+    # whole row in get_current_user; treat it as empty prefs, as before
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return {}
+
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if DATABASE_URL.startswith('sqlite') else {},
+    # JSON columns (User.prefs) are (de)serialized with orjson
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    json_deserializer=_json_loads,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 def init_db():
     from . import models
-    Base.metadata.create_all(bind=engine)
+    try:
+        Base.metadata.create_all(bind=engine)
+    except (OperationalError, ProgrammingError):
+        # another worker process created the tables between create_all's
+        # existence check and its CREATE TABLE (SQLite raises OperationalError,
+        # PostgreSQL DuplicateTable -> ProgrammingError); the second pass sees them
+        Base.metadata.create_all(bind=engine)
@@ -1,17 +1,23 @@
 from fastapi import FastAPI, Body, HTTPException, Depends, Query
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
-import json
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Optional, Dict, Any, Tuple
+from bisect import bisect_right
+from functools import lru_cache
+import itertools
 import os
+import re
+import orjson
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 
-# load backend/.env for local development (ignored by git)
+# load backend/.env for local development (ignored by git); this has to stay at
+# import time because .db and .auth read DATABASE_URL / JWT_SECRET when imported
 base_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..'))
 dotenv_path = os.path.join(base_dir, '.env')
 load_dotenv(dotenv_path)
 
-app = FastAPI(title="Recipe Rag Assistant - API")
+app = FastAPI(title="Recipe Rag Assistant - API", default_response_class=ORJSONResponse)
 
 # enable CORS for local frontend development
 app.add_middleware(
@@ -22,14 +28,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# initialize DB
+# initialize DB on startup rather than at import, so importing the app
+# (tests, reloads, tooling) doesn't touch the database
 from .db import init_db
-init_db()
 
-from .auth import get_db, create_user, authenticate_user, create_access_token, get_current_user
+_db_initialized = False
+
+
+@app.on_event("startup")
+def _init_db():
+    global _db_initialized
+    if not _db_initialized:
+        init_db()
+        _db_initialized = True
+
+from .auth import get_db, create_user, authenticate_user, create_access_token, get_current_user, get_current_admin
 from . import models
 from sqlalchemy.orm import Session
-import json as _json
 
 
 @app.post('/auth/register')
@@ -52,15 +67,21 @@ def login(username: str = Body(...), password: str = Body(...), db: Session = De
 
 @app.get('/user/prefs')
 def get_prefs(current_user = Depends(get_current_user)):
-    try:
-        return _json.loads(current_user.prefs or '{}')
-    except Exception:
-        return {}
+    prefs = current_user.prefs
+    if isinstance(prefs, str):
+        # PostgreSQL only: create_all doesn't alter an existing TEXT prefs column,
+        # and psycopg2 hands TEXT back undecoded. SQLite rows are decoded (and bad
+        # values mapped to {}) by the engine's json_deserializer in db.py.
+        try:
+            prefs = orjson.loads(prefs)
+        except orjson.JSONDecodeError:
+            return {}
+    return prefs or {}
 
 
 @app.post('/user/prefs')
 def set_prefs(prefs: Dict[str, Any] = Body(...), db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    current_user.prefs = _json.dumps(prefs)
+    current_user.prefs = prefs
     db.add(current_user)
     db.commit()
     return {'status': 'ok'}
@@ -83,26 +104,141 @@ class GroceryRequest(BaseModel):
     recipe_ids: List[str]
 
 
-def _data_dir() -> str:
-    return os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+# data file locations, resolved once at import
+_DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+_RECIPES_PATH = os.path.join(_DATA_DIR, 'recipes.json')
+_SAMPLE_PATH = os.path.join(_DATA_DIR, 'recipes.sample.json')
+_COMPRESSED_INDEX_PATH = os.path.join(_DATA_DIR, 'compressed_index.json')
 
 
 def load_recipes() -> List[Dict[str, Any]]:
-    base = _data_dir()
-    path = os.path.join(base, 'recipes.json')
+    # prefer `data/recipes.json` if present, otherwise fall back to sample
+    path = _RECIPES_PATH
     if not os.path.exists(path):
-        path = os.path.join(base, 'recipes.sample.json')
+        path = _SAMPLE_PATH
     if not os.path.exists(path):
         return []
-    with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+# all search blobs joined by _SEARCH_SEP; see _RecipeCache.search_offsets
+_SEARCH_SEP = '\x1f'
+
+
+class _RecipeCache:
+    """Immutable snapshot of the loaded recipes and everything derived from them.
+
+    reload_recipes() swaps in a new snapshot with a single assignment, so a
+    handler that binds `_recipe_cache()` once never sees a mix of old and new.
+    """
+    __slots__ = ('generation', 'recipes', 'by_id', 'search_text', 'search_offsets', 'ingredient_blobs', 'grocery_rows')
+
+    def __init__(self, generation, recipes, by_id, search_text, search_offsets, ingredient_blobs, grocery_rows):
+        self.generation = generation
+        self.recipes: List[Dict[str, Any]] = recipes
+        self.by_id: Dict[str, Dict[str, Any]] = by_id
+        self.search_text: str = search_text
+        # search_offsets[k] is where recipe k starts in search_text
+        self.search_offsets: List[int] = search_offsets
+        # lowercased ingredient names per recipe (parallel to recipes), for /mealplan
+        self.ingredient_blobs: List[str] = ingredient_blobs
+        # recipe id -> normalized ingredient rows, for /grocery
+        self.grocery_rows: Dict[str, List[Tuple[str, Any, Any, Any, Any]]] = grocery_rows
+
+    # hashed by generation so it can be part of the _search_matches key
+    def __hash__(self):
+        return hash(self.generation)
+
+    def __eq__(self, other):
+        return isinstance(other, _RecipeCache) and other.generation == self.generation
+
+
+_CACHE: Optional[_RecipeCache] = None
+_cache_generation = itertools.count(1)
+
+
+def _search_blob(r: Dict[str, Any]) -> str:
+    """Lowercased title + ingredient + step text used by /search."""
+    parts = [str(r.get('title') or '')]
+    # ingredients: list of strings or dicts
+    for ing in r.get('ingredients') or []:
+        if isinstance(ing, str):
+            parts.append(ing)
+        elif isinstance(ing, dict):
+            parts.append(str(ing.get('name') or ing.get('raw') or ''))
+    for s in r.get('steps') or []:
+        if isinstance(s, str):
+            parts.append(s)
+    # newline-separated so a query can't match across two fields
+    return '\n'.join(parts).lower()
+
+
+def _ingredient_blob(r: Dict[str, Any]) -> str:
+    """Lowercased ingredient names, newline-separated, used by /mealplan."""
+    names = []
+    for i in r.get('ingredients', []):
+        if isinstance(i, dict):
+            names.append(str(i.get('name') or ''))
+        else:
+            names.append(str(i))
+    return '\n'.join(n.replace('\n', ' ') for n in names).lower()
+
+
+def _grocery_rows(r: Dict[str, Any]) -> List[Tuple[str, Any, Any, Any, Any]]:
+    """(key, name, quantity, initial quantity, unit) per ingredient, used by /grocery."""
+    rows = []
+    for ing in r.get('ingredients', []):
+        if isinstance(ing, dict):
+            name = ing.get('name') or ing.get('raw') or ''
+            qty = ing.get('quantity')
+            rows.append((str(name).strip().lower(), name, qty, qty or 0, ing.get('unit')))
+        else:
+            # raw string, aggregate by raw text; never summed
+            raw = str(ing)
+            rows.append((raw.strip().lower(), raw, None, None, None))
+    return rows
+
+
+def reload_recipes() -> List[Dict[str, Any]]:
+    global _CACHE
+    recipes = load_recipes()
+    # reversed so the first recipe wins on duplicate ids, like the old linear scan
+    by_id = {str(r.get('id')): r for r in reversed(recipes)}
+    blobs = [_search_blob(r).replace(_SEARCH_SEP, ' ') for r in recipes]
+    offsets = []
+    pos = 0
+    for b in blobs:
+        offsets.append(pos)
+        pos += len(b) + 1
+    _CACHE = _RecipeCache(
+        generation=next(_cache_generation),
+        recipes=recipes,
+        by_id=by_id,
+        search_text=_SEARCH_SEP.join(blobs),
+        search_offsets=offsets,
+        ingredient_blobs=[_ingredient_blob(r) for r in recipes],
+        grocery_rows={rid: _grocery_rows(r) for rid, r in by_id.items()},
+    )
+    # entries for older snapshots can never hit again; drop them to free memory
+    _search_matches.cache_clear()
+    return recipes
+
+
+def _recipe_cache() -> _RecipeCache:
+    cache = _CACHE
+    if cache is not None:
+        return cache
+    reload_recipes()
+    return _CACHE
+
+
+def get_recipes() -> List[Dict[str, Any]]:
+    return _recipe_cache().recipes
 
 
 def get_recipe_by_id(rid: str) -> Optional[Dict[str, Any]]:
-    for r in load_recipes():
-        if str(r.get('id')) == str(rid):
-            return r
-    return None
+    return _recipe_cache().by_id.get(str(rid))
 
 
 _COMPRESSED_INDEX_CACHE: Optional[Dict[str, Any]] = None
@@ -113,18 +249,54 @@ def load_compressed_index() -> Dict[str, Any]:
     cache = _COMPRESSED_INDEX_CACHE
     if cache is not None:
         return cache
-    base = _data_dir()
-    path = os.path.join(base, 'compressed_index.json')
-    if not os.path.exists(path):
-        path = os.path.join(base, 'compressed_index.json')
+    path = _COMPRESSED_INDEX_PATH
     if not os.path.exists(path):
-        empty = {'count': 0, 'entries': []}
-        _COMPRESSED_INDEX_CACHE = empty
-        return empty
-    with open(path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        _COMPRESSED_INDEX_CACHE = data
-        return data
+        data = {'count': 0, 'entries': []}
+    else:
+        with open(path, 'rb') as f:
+            data = orjson.loads(f.read())
+    # aggregates only change with the index file, so compute them once here
+    entries = data.get('entries', [])
+    data['_bytes_saved'] = sum(
+        (e.get('orig_len') or 0) - (e.get('compressed_len') or 0)
+        for e in entries
+        if e.get('orig_len')
+    )
+    data['_by_id'] = {str(e.get('id')): e for e in reversed(entries)}
+    # every position of each id, so the /compress-status ids filter can keep index order
+    positions: Dict[str, List[int]] = {}
+    for n, e in enumerate(entries):
+        positions.setdefault(str(e.get('id')), []).append(n)
+    data['_positions'] = positions
+    _COMPRESSED_INDEX_CACHE = data
+    return data
+
+
+# number of items encoded per chunk when streaming large JSON arrays
+STREAM_CHUNK = 256
+
+
+def _stream_json_array(head: bytes, items: List[Any], tail: bytes):
+    """Yield `head`, `items` as a JSON array, then `tail`, without building the whole body."""
+    yield head + b'['
+    dumps = orjson.dumps
+    for start in range(0, len(items), STREAM_CHUNK):
+        chunk = b','.join([dumps(it) for it in items[start:start + STREAM_CHUNK]])
+        yield b',' + chunk if start else chunk
+    yield b']' + tail
+
+
+@app.on_event("startup")
+def _load_recipe_cache():
+    reload_recipes()
+
+
+@app.post('/admin/reload')
+def admin_reload(current_user = Depends(get_current_admin)):
+    global _COMPRESSED_INDEX_CACHE
+    recipes = reload_recipes()
+    _COMPRESSED_INDEX_CACHE = None
+    return {'status': 'ok', 'count': len(recipes)}
 
 
 @app.get("/health")
@@ -134,48 +306,39 @@ def health():
 
 @app.get("/recipes/sample")
 def sample_recipes():
-    # prefer `data/recipes.json` if present, otherwise fall back to sample
-    base = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
-    sample_path = os.path.join(base, 'recipes.json')
-    if not os.path.exists(sample_path):
-        sample_path = os.path.join(base, 'recipes.sample.json')
-    sample_path = os.path.normpath(sample_path)
-    if os.path.exists(sample_path):
-        with open(sample_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return {"count": len(data), "recipes": data}
-    return {"count": 0, "recipes": []}
+    data = get_recipes()
+    head = b'{"count":' + orjson.dumps(len(data)) + b',"recipes":'
+    return StreamingResponse(_stream_json_array(head, data, b'}'), media_type='application/json')
+
+
+# bounded so a stream of distinct queries can't grow memory without limit
+SEARCH_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=SEARCH_CACHE_SIZE)
+def _search_matches(cache: _RecipeCache, ql: str) -> Tuple[Dict[str, Any], ...]:
+    if _SEARCH_SEP in ql:
+        return ()
+    # scan the joined text with str.find; after a hit skip to the next recipe
+    recipes, text, offsets = cache.recipes, cache.search_text, cache.search_offsets
+    out = []
+    pos = text.find(ql)
+    while pos != -1:
+        k = bisect_right(offsets, pos) - 1
+        out.append(recipes[k])
+        if k + 1 >= len(offsets):
+            break
+        pos = text.find(ql, offsets[k + 1])
+    return tuple(out)
 
 
 @app.get("/search")
 def search(q: str = ""):
-    # Search titles and ingredient text (supports simple CSV-derived samples)
-    sample = sample_recipes()["recipes"]
+    # Search titles, ingredient text and steps against the precomputed blobs
+    cache = _recipe_cache()
     if not q:
-        return sample
-    ql = q.lower()
-    def matches(r):
-        title = (r.get('title') or '')
-        if ql in title.lower():
-            return True
-        # check ingredients: list of strings or dicts
-        ings = r.get('ingredients') or []
-        for ing in ings:
-            if isinstance(ing, str):
-                if ql in ing.lower():
-                    return True
-            elif isinstance(ing, dict):
-                name = (ing.get('name') or ing.get('raw') or '')
-                if ql in str(name).lower():
-                    return True
-        # check steps
-        steps = r.get('steps') or []
-        for s in steps:
-            if isinstance(s, str) and ql in s.lower():
-                return True
-        return False
-
-    return [r for r in sample if matches(r)]
+        return cache.recipes
+    return list(_search_matches(cache, q.lower()))
 
 
 @app.get('/recipe/{recipe_id}')
@@ -185,32 +348,23 @@ def recipe_detail(recipe_id: str):
         raise HTTPException(status_code=404, detail='recipe not found')
     # attach compression metadata if available
     comp_index = load_compressed_index()
-    entry = next((e for e in comp_index.get('entries', []) if e.get('id') == recipe_id), None)
+    entry = comp_index['_by_id'].get(recipe_id)
     return {'recipe': r, 'compression': entry}
 
 
 @app.post('/mealplan')
 def mealplan(req: MealPlanRequest = Body(...)):
-    recipes = load_recipes()
+    cache = _recipe_cache()
+    recipes = cache.recipes
     if not recipes:
         raise HTTPException(status_code=500, detail='no recipes available')
-    # simple filter by exclusion of restriction keywords in ingredients
-    def allowed(r):
-        if not req.dietary_restrictions:
-            return True
-        ings = r.get('ingredients', [])
-        names = []
-        for i in ings:
-            if isinstance(i, dict):
-                names.append((i.get('name') or '') .lower())
-            else:
-                names.append(str(i).lower())
-        for dr in req.dietary_restrictions:
-            if any(dr.lower() in n for n in names):
-                return False
-        return True
-
-    pool = [r for r in recipes if allowed(r)]
+    # simple filter by exclusion of restriction keywords in ingredients:
+    # one alternation regex checked once against each recipe's ingredient blob
+    if req.dietary_restrictions:
+        excluded = re.compile('|'.join(re.escape(dr.lower()) for dr in req.dietary_restrictions))
+        pool = [r for r, blob in zip(recipes, cache.ingredient_blobs) if not excluded.search(blob)]
+    else:
+        pool = recipes
     if not pool:
         raise HTTPException(status_code=400, detail='no recipes match dietary restrictions')
 
@@ -227,58 +381,39 @@ def mealplan(req: MealPlanRequest = Body(...)):
 
 @app.post('/grocery')
 def grocery(req: GroceryRequest = Body(...)):
+    rows_by_id = _recipe_cache().grocery_rows
     items = {}
     for rid in req.recipe_ids:
-        r = get_recipe_by_id(rid)
-        if not r:
-            continue
-        for ing in r.get('ingredients', []):
-            if isinstance(ing, dict):
-                name = ing.get('name') or ing.get('raw') or ''
-                qty = ing.get('quantity')
-                unit = ing.get('unit')
-                key = str(name).strip().lower()
-                if key not in items:
-                    items[key] = {'name': name, 'quantity': qty or 0, 'unit': unit}
-                else:
-                    # sum numeric quantities when possible
-                    try:
-                        if qty:
-                            items[key]['quantity'] = (items[key].get('quantity') or 0) + qty
-                    except Exception:
-                        pass
-            else:
-                # raw string, aggregate by raw text
-                key = str(ing).strip().lower()
-                if key not in items:
-                    items[key] = {'name': str(ing), 'quantity': None, 'unit': None}
+        for key, name, qty, initial, unit in rows_by_id.get(str(rid), ()):
+            it = items.get(key)
+            if it is None:
+                items[key] = {'name': name, 'quantity': initial, 'unit': unit}
+            elif qty:
+                # sum numeric quantities when possible
+                try:
+                    it['quantity'] = (it['quantity'] or 0) + qty
+                except Exception:
+                    pass
     return {'grocery': list(items.values())}
 
 
 @app.get('/compress-status')
 def compress_status(limit: Optional[int] = None, ids: Optional[List[str]] = Query(default=None)):
     idx = load_compressed_index()
-    total = idx.get('count', 0)
-    all_entries = idx.get('entries', [])
-    saved_total = sum(
-        (e.get('orig_len') or 0) - (e.get('compressed_len') or 0)
-        for e in all_entries
-        if e.get('orig_len')
-    )
-
-    entries = all_entries
+    entries = idx.get('entries', [])
     if ids:
-        wanted = {str(i) for i in ids}
-        entries = [e for e in entries if str(e.get('id')) in wanted]
+        positions = idx['_positions']
+        hits = sorted(n for i in {str(i) for i in ids} for n in positions.get(i, ()))
+        entries = [entries[n] for n in hits]
     elif limit is not None:
         limit = max(0, min(5000, int(limit)))
         entries = entries[:limit]
-    return {'count': total, 'entries': entries, 'bytes_saved': saved_total}
+    head = b'{"count":' + orjson.dumps(idx.get('count', 0)) + b',"entries":'
+    tail = b',"bytes_saved":' + orjson.dumps(idx['_bytes_saved']) + b'}'
+    return StreamingResponse(_stream_json_array(head, entries, tail), media_type='application/json')
 
 
 @app.get('/compress-status/summary')
 def compress_status_summary():
     idx = load_compressed_index()
-    entries = idx.get('entries', [])
-    saved = sum((e.get('orig_len') or 0) - (e.get('compressed_len') or 0) for e in entries if e.get('orig_len'))
-    return {'count': idx.get('count', 0), 'bytes_saved': saved}
+    return {'count': idx.get('count', 0), 'bytes_saved': idx['_bytes_saved']}
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Integer, String, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from .db import Base
 
 
@@ -7,4 +8,4 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(128), unique=True, index=True, nullable=False)
     hashed_password = Column(String(256), nullable=False)
-    prefs = Column(Text, nullable=True)  # JSON string for preferences
+    prefs = Column(JSON().with_variant(JSONB, 'postgresql'), nullable=True)  # preferences dict
@@ -1,14 +1,26 @@
 """Compress recipes using ScaleDown client and write blobs + index.
 
 Outputs:
-  data/compressed/<recipe_id>.json  - compressed blob + metadata
-  data/compressed_index.json       - mapping and stats
+  data/compressed/shard_<run>_NNN.bin  - raw compressed blobs, appended back to back
+  data/compressed_index.json           - mapping (shard, offset, length) and stats
+
+Each run writes shards under a fresh <run> id and then atomically replaces
+the index, so the index on disk always points at a complete set of shards.
 """
+import base64
+import binascii
 import json
+import os
+import orjson
+import threading
+import uuid
+import zlib
 from pathlib import Path
-from scripts.scaledown_client import compress_text
+from scripts.scaledown_client import compress_text, POOL_SIZE
+from concurrent.futures import ThreadPoolExecutor
 import argparse
-import re
+
+NUM_SHARDS = 16
 
 
 def build_text_for_recipe(r: dict) -> str:
@@ -34,38 +46,115 @@ def build_text_for_recipe(r: dict) -> str:
     return '\n'.join(parts)
 
 
-def run(in_file: Path, out_dir: Path, index_file: Path, sample: int = 0):
+def shard_name(run: str, n: int) -> str:
+    return f'shard_{run}_{n:03d}.bin'
+
+
+class ShardWriter:
+    """Append blobs to a fixed set of shard files instead of one file per recipe.
+
+    Every writer uses its own run id in the shard names, so it never touches
+    shards that an existing index points into.
+    """
+
+    def __init__(self, out_dir: Path, num_shards: int = NUM_SHARDS):
+        self.num_shards = num_shards
+        self.run = uuid.uuid4().hex[:12]
+        self.paths = [out_dir / shard_name(self.run, n) for n in range(num_shards)]
+        self.files = []
+        self.locks = [threading.Lock() for _ in range(num_shards)]
+        try:
+            for p in self.paths:
+                self.files.append(open(p, 'wb'))
+        except BaseException:
+            self.close()
+            self.discard()
+            raise
+
+    def append(self, rid, data: bytes):
+        # crc32 rather than hash() so the shard is stable across runs
+        n = zlib.crc32(str(rid).encode('utf-8')) % self.num_shards
+        f = self.files[n]
+        with self.locks[n]:
+            offset = f.tell()
+            f.write(data)
+        return shard_name(self.run, n), offset, len(data)
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+    def discard(self):
+        for p in self.paths:
+            if p.exists():
+                p.unlink()
+
+
+def _remove_stale_shards(out_dir: Path, keep):
+    """Delete shard files from earlier runs that the current index no longer uses."""
+    for p in out_dir.glob('shard_*.bin'):
+        if p.name not in keep:
+            p.unlink()
+
+
+def read_blob(out_dir: Path, entry: dict) -> bytes:
+    """Return the raw blob bytes for an index entry written by `run`."""
+    with open(Path(out_dir) / entry['shard'], 'rb') as f:
+        f.seek(entry['offset'])
+        return f.read(entry['length'])
+
+
+def _process_one(item, writer: ShardWriter) -> dict:
+    i, r = item
+    rid = r.get('id') or f'recipe_{i}'
+    text = build_text_for_recipe(r)
+    # raw=True: simulated blobs come back as bytes, no base64 round trip
+    resp = compress_text(text, raw=True)
+    data = resp.get('compressed_blob')
+    if data is None:
+        blob = resp.get('compressed_blob_b64')
+        if isinstance(blob, str):
+            # the API path may hand back a non-base64 'blob'/'compressed' value
+            try:
+                data = base64.b64decode(blob, validate=True)
+            except binascii.Error:
+                data = blob.encode('utf-8')
+        else:
+            # API responses without a blob: keep whatever metadata came back
+            data = orjson.dumps(resp.get('meta') or resp.get('data'))
+    shard, offset, length = writer.append(rid, data)
+    return {'id': rid, 'shard': shard, 'offset': offset, 'length': length, 'method': resp.get('method'), 'orig_len': resp.get('orig_len'), 'compressed_len': resp.get('compressed_len')}
+
+
+def run(in_file: Path, out_dir: Path, index_file: Path, sample: int = 0, workers: int = POOL_SIZE):
     out_dir.mkdir(parents=True, exist_ok=True)
-    with open(in_file, 'r', encoding='utf-8') as f:
-        recipes = json.load(f)
-    index = {'count': 0, 'entries': []}
-    for i, r in enumerate(recipes):
-        if sample and i >= sample:
-            break
-        rid = r.get('id') or f'recipe_{i}'
-        # sanitize id for use as filename
-        safe = re.sub(r'[^A-Za-z0-9._-]', '_', str(rid)).strip('_')
-        if not safe:
-            safe = f'recipe_{i}'
-        text = build_text_for_recipe(r)
-        resp = compress_text(text)
-        # write blob file
-        blob_name = f"{i}_{safe}.json"
-        blob_path = out_dir / blob_name
-        blob_obj = {
-            'id': rid,
-            'method': resp.get('method'),
-            'compressed_blob_b64': resp.get('compressed_blob_b64') or resp.get('meta') or resp.get('data'),
-            'orig_len': resp.get('orig_len'),
-            'compressed_len': resp.get('compressed_len')
-        }
-        with open(blob_path, 'w', encoding='utf-8') as bf:
-            json.dump(blob_obj, bf, indent=2, ensure_ascii=False)
-        index['entries'].append({'id': rid, 'blob': str(blob_path.name), 'method': blob_obj['method'], 'orig_len': blob_obj.get('orig_len'), 'compressed_len': blob_obj.get('compressed_len')})
-        index['count'] += 1
-    with open(index_file, 'w', encoding='utf-8') as ix:
-        json.dump(index, ix, indent=2, ensure_ascii=False)
-    print('wrote blobs to', out_dir, 'index=', index_file)
+    with open(in_file, 'rb') as f:
+        recipes = orjson.loads(f.read())
+    if sample:
+        recipes = recipes[:sample]
+    index_tmp = index_file.with_name(index_file.name + '.tmp')
+    writer = None
+    try:
+        writer = ShardWriter(out_dir)
+        # compress_text is network-bound when the API is configured, so fan out;
+        # executor.map keeps index entries in input order
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            entries = list(executor.map(lambda item: _process_one(item, writer), enumerate(recipes)))
+        writer.close()
+        index = {'count': len(entries), 'run': writer.run, 'shards': writer.num_shards, 'entries': entries}
+        with open(index_tmp, 'wb') as ix:
+            ix.write(orjson.dumps(index))
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            writer.discard()
+        if index_tmp.exists():
+            index_tmp.unlink()
+        raise
+    # the new shards are complete; a single rename switches the index over to them
+    os.replace(index_tmp, index_file)
+    _remove_stale_shards(out_dir, {p.name for p in writer.paths})
+    print('wrote shards to', out_dir, 'index=', index_file)
 
 
 def cli():
@@ -74,8 +163,9 @@ def cli():
     parser.add_argument('--out-dir', dest='outdir', default='data/compressed')
     parser.add_argument('--index', dest='index', default='data/compressed_index.json')
     parser.add_argument('--sample', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=POOL_SIZE)
     args = parser.parse_args()
-    run(Path(args.infile), Path(args.outdir), Path(args.index), sample=args.sample or 0)
+    run(Path(args.infile), Path(args.outdir), Path(args.index), sample=args.sample or 0, workers=args.workers)
 
 
 if __name__ == '__main__':
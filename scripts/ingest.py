@@ -2,7 +2,7 @@
 Sample ingestion script (template).
 This reads JSON files in `data/recipes_raw/` and normalizes them to `data/recipes.json`.
 """
-import json
+import orjson
 from pathlib import Path
 
 RAW_DIR = Path(__file__).resolve().parents[0] / '..' / 'data' / 'recipes_raw'
@@ -24,8 +24,8 @@ def run():
     collected = []
     for p in RAW_DIR.glob('*.json'):
         try:
-            with open(p, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(p, 'rb') as f:
+                data = orjson.loads(f.read())
             if isinstance(data, list):
                 for r in data:
                     collected.append(normalize_recipe(r))
@@ -34,8 +34,8 @@ def run():
         except Exception as e:
             print('skip', p, e)
 
-    with open(OUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(collected, f, indent=2)
+    with open(OUT_FILE, 'wb') as f:
+        f.write(orjson.dumps(collected, option=orjson.OPT_INDENT_2))
     print('wrote', OUT_FILE, 'count=', len(collected))
 
 """Ingestion CLI
@@ -50,11 +50,22 @@ Usage:
 import argparse
 import csv
 import json
+import orjson
 import re
 from pathlib import Path
 from fractions import Fraction
 from typing import Optional
 
+# optional fast CSV readers; csv.DictReader is used when neither is installed
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+try:
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa_csv = None
+
 # common encodings to try when reading large CSVs
 TRY_ENCODINGS = ['utf-8', 'utf-8-sig', 'cp1252', 'latin-1', 'utf-16']
 
@@ -84,10 +95,73 @@ def detect_csv_encoding(path: Path):
     return None
 
 
+def _polars_read_csv(path: Path):
+    # all columns as strings, with empty cells as '' like csv.DictReader; the
+    # keyword for that was renamed in polars 2 (empty_string_is_null=False)
+    try:
+        return pl.read_csv(path, infer_schema_length=0, missing_utf8_is_empty_string=True)
+    except TypeError:
+        return pl.read_csv(path, infer_schema_length=0, empty_string_is_null=False)
+
+
+def _pyarrow_csv_table(path: Path):
+    # force every column to string and disable null detection, so cells like
+    # '007' or 'NA' come through exactly as csv.DictReader would return them
+    with path.open('r', encoding='utf-8-sig', newline='') as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        return None
+    convert = pa_csv.ConvertOptions(
+        column_types={name: 'string' for name in header},
+        null_values=[],
+        strings_can_be_null=False,
+        quoted_strings_can_be_null=False,
+    )
+    # quoted multi-line cells (e.g. steps) are common in recipe exports
+    parse = pa_csv.ParseOptions(newlines_in_values=True)
+    return pa_csv.read_csv(path, parse_options=parse, convert_options=convert)
+
+
+def iter_csv_rows(path: Path):
+    """Yield CSV rows as dicts, preferring a columnar reader when installed.
+
+    polars (then pyarrow) parse the file in native threads and only need
+    utf-8; anything they reject falls back to csv.DictReader with encoding
+    detection.
+    """
+    if pl is not None:
+        try:
+            df = _polars_read_csv(path)
+        except Exception:
+            df = None
+        if df is not None:
+            yield from df.iter_rows(named=True)
+            return
+    if pa_csv is not None:
+        try:
+            table = _pyarrow_csv_table(path)
+        except Exception:
+            table = None
+        if table is not None:
+            # materialize Python dicts one record batch at a time, so a caller
+            # that stops early (sample_limit) never converts the rest
+            for batch in table.to_batches():
+                yield from batch.to_pylist()
+            return
+    enc = detect_csv_encoding(path) or 'utf-8'
+    with open(path, 'r', encoding=enc, newline='') as f:
+        yield from csv.DictReader(f)
+
+
 def parse_quantity(qstr: str) -> Optional[float]:
     if not qstr:
         return None
     qstr = qstr.strip()
+    # fast path: plain integers / decimals need no Fraction or exception handling
+    if qstr.isdecimal():
+        return float(qstr)
+    if '/' not in qstr and qstr.replace('.', '', 1).isdecimal():
+        return float(qstr)
     # handle mixed numbers like '1 1/2'
     try:
         if ' ' in qstr and '/' in qstr:
@@ -113,26 +187,33 @@ UNIT_MAP = {
 }
 
 
+_unit_get = UNIT_MAP.get
+
+
 def normalize_unit(u: Optional[str]) -> Optional[str]:
     if not u:
         return None
     u = u.lower().strip().rstrip('.')
-    return UNIT_MAP.get(u, u)
+    return _unit_get(u, u)
 
 
-ING_RE = re.compile(r"^\s*(?P<qty>\d+(?:[ \t]\d+\/\d+|\/\d+|\.\d+)?)?\s*(?P<unit>[a-zA-Z]+)?\s*(?P<name>.+)$")
+ING_PATTERN = r"^\s*(?P<qty>\d+(?:[ \t]\d+\/\d+|\/\d+|\.\d+)?)?\s*(?P<unit>[a-zA-Z]+)?\s*(?P<name>.+)$"
+# prefer google-re2 (linear-time DFA, no backtracking) when installed
+try:
+    import re2
+    ING_RE = re2.compile(ING_PATTERN)
+except Exception:
+    ING_RE = re.compile(ING_PATTERN)
 
 
 def parse_ingredient(ing_raw: str) -> dict:
     m = ING_RE.match(ing_raw)
     if not m:
         return {'raw': ing_raw, 'quantity': None, 'unit': None, 'name': ing_raw.strip()}
-    qty = m.group('qty')
-    unit = m.group('unit')
-    name = m.group('name') or ''
+    qty, unit, name = m.groups()
     quantity = parse_quantity(qty) if qty else None
-    unit_n = normalize_unit(unit)
-    return {'raw': ing_raw, 'quantity': quantity, 'unit': unit_n, 'name': name.strip()}
+    unit_n = normalize_unit(unit) if unit else None
+    return {'raw': ing_raw, 'quantity': quantity, 'unit': unit_n, 'name': (name or '').strip()}
 
 
 def split_delimited_field(val: Optional[str]):
@@ -198,8 +279,8 @@ def run(raw_dir: Path, out_file: Path, sample_limit: Optional[int] = None):
     for p in sorted(raw_dir.glob('*')):
         try:
             if p.suffix.lower() == '.json':
-                with open(p, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(p, 'rb') as f:
+                    data = orjson.loads(f.read())
                 items = data if isinstance(data, list) else [data]
                 for r in items:
                     nr = normalize_recipe(r)
@@ -210,33 +291,30 @@ def run(raw_dir: Path, out_file: Path, sample_limit: Optional[int] = None):
                     if sample_limit and len(collected) >= sample_limit:
                         break
             elif p.suffix.lower() == '.csv':
-                # detect encoding (tries common encodings)
-                enc = detect_csv_encoding(p) or 'utf-8'
-                with open(p, 'r', encoding=enc, newline='') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        # CSV columns expected: id,title,ingredients,steps,nutrition,source_url
-                        # support many header name variants
-                        title = row.get('title') or row.get('recipe_title') or row.get('name') or row.get('headline')
-                        steps_raw = row.get('steps') or row.get('directions') or row.get('instructions') or row.get('description')
-                        item = {
-                            'id': row.get('id') or row.get('url') or title,
-                            'title': title,
-                            'ingredients': parse_csv_cell(row.get('ingredients') or row.get('ingredient') or row.get('ingredients_list')),
-                            'steps': parse_csv_cell(steps_raw),
-                            'nutrition': row.get('nutrition') or row.get('nutrition_info') or {},
-                            'source_url': row.get('source_url') or row.get('url') or row.get('source')
-                        }
-                        # if steps empty but description exists, use description as a single step
-                        if (not item['steps']) and row.get('description'):
-                            item['steps'] = [row.get('description')]
-                        nr = normalize_recipe(item)
-                        if nr['id'] in seen_ids:
-                            continue
-                        seen_ids.add(nr['id'])
-                        collected.append(nr)
-                        if sample_limit and len(collected) >= sample_limit:
-                            break
+                # columnar reader when available, csv.DictReader otherwise
+                for row in iter_csv_rows(p):
+                    # CSV columns expected: id,title,ingredients,steps,nutrition,source_url
+                    # support many header name variants
+                    title = row.get('title') or row.get('recipe_title') or row.get('name') or row.get('headline')
+                    steps_raw = row.get('steps') or row.get('directions') or row.get('instructions') or row.get('description')
+                    item = {
+                        'id': row.get('id') or row.get('url') or title,
+                        'title': title,
+                        'ingredients': parse_csv_cell(row.get('ingredients') or row.get('ingredient') or row.get('ingredients_list')),
+                        'steps': parse_csv_cell(steps_raw),
+                        'nutrition': row.get('nutrition') or row.get('nutrition_info') or {},
+                        'source_url': row.get('source_url') or row.get('url') or row.get('source')
+                    }
+                    # if steps empty but description exists, use description as a single step
+                    if (not item['steps']) and row.get('description'):
+                        item['steps'] = [row.get('description')]
+                    nr = normalize_recipe(item)
+                    if nr['id'] in seen_ids:
+                        continue
+                    seen_ids.add(nr['id'])
+                    collected.append(nr)
+                    if sample_limit and len(collected) >= sample_limit:
+                        break
             else:
                 # skip unknown file types
                 continue
@@ -246,8 +324,8 @@ def run(raw_dir: Path, out_file: Path, sample_limit: Optional[int] = None):
             print('skip', p, e)
 
     out_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(out_file, 'w', encoding='utf-8') as f:
-        json.dump(collected, f, indent=2, ensure_ascii=False)
+    with open(out_file, 'wb') as f:
+        f.write(orjson.dumps(collected, option=orjson.OPT_INDENT_2))
     print('wrote', out_file, 'count=', len(collected))
 
 
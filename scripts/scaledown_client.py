@@ -2,17 +2,27 @@
 
 This module tries to call a ScaleDown API when `SCALEDOWN_API_URL`
 and `SCALEDOWN_API_KEY` env vars are set. If not available it falls
-back to a local simulated compression using zlib + base64 so you can
-test compression flows without a real API key.
+back to a local simulated compression so you can test compression
+flows without a real API key: zstandard (method='zstd') when installed,
+optionally with a trained dictionary at `data/zstd_dict.bin`, otherwise
+zlib level 1 (method='simulated').
 """
 import os
 import json
 import base64
+import threading
 import zlib
+from pathlib import Path
 from typing import Dict, Any
 
+try:
+    import zstandard as zstd  # optional, faster than zlib at a similar ratio
+except Exception:
+    zstd = None
+
 try:
     import requests  # optional in some environments
+    from requests.adapters import HTTPAdapter
 except Exception:
     requests = None
 
@@ -20,34 +30,91 @@ except Exception:
 SCALEDOWN_API_KEY = os.environ.get('SCALEDOWN_API_KEY')
 SCALEDOWN_API_URL = os.environ.get('SCALEDOWN_API_URL')  # full endpoint, e.g. https://api.scaledown.example/v1/compress
 
+# shared keep-alive session; pool sized for the compress_recipes thread pool
+POOL_SIZE = 32
+_SESSION = None
+if requests is not None:
+    _SESSION = requests.Session()
+    _adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    _SESSION.mount('https://', _adapter)
+    _SESSION.mount('http://', _adapter)
+
+ZSTD_LEVEL = 3
+ZSTD_DICT_PATH = Path(__file__).resolve().parents[1] / 'data' / 'zstd_dict.bin'
+_ZSTD_DICT = None
+if zstd is not None and ZSTD_DICT_PATH.exists():
+    _ZSTD_DICT = zstd.ZstdCompressionDict(ZSTD_DICT_PATH.read_bytes())
+
+# zstd (de)compressors are not safe to share between threads
+_zstd_local = threading.local()
+
+
+def _zstd_cctx():
+    cctx = getattr(_zstd_local, 'cctx', None)
+    if cctx is None:
+        cctx = _zstd_local.cctx = zstd.ZstdCompressor(level=ZSTD_LEVEL, dict_data=_ZSTD_DICT)
+    return cctx
+
+
+def _zstd_dctx():
+    dctx = getattr(_zstd_local, 'dctx', None)
+    if dctx is None:
+        dctx = _zstd_local.dctx = zstd.ZstdDecompressor(dict_data=_ZSTD_DICT)
+    return dctx
 
-def _simulate_compress(text: str) -> Dict[str, Any]:
+
+def train_zstd_dict(samples, size: int = 65536, out_path: Path = ZSTD_DICT_PATH) -> Path:
+    """Train a shared zstd dictionary from sample texts and write it to `out_path`.
+
+    Restart the process afterwards so the new dictionary is picked up.
+    """
+    if zstd is None:
+        raise RuntimeError('zstandard is not installed')
+    d = zstd.train_dictionary(size, [s.encode('utf-8') for s in samples])
+    out_path.write_bytes(d.as_bytes())
+    return out_path
+
+
+def _simulate_compress(text: str, raw: bool = False) -> Dict[str, Any]:
     b = text.encode('utf-8')
-    comp = zlib.compress(b)
-    b64 = base64.b64encode(comp).decode('ascii')
-    return {
-        'method': 'simulated',
-        'compressed_blob_b64': b64,
+    if zstd is not None:
+        method = 'zstd'
+        comp = _zstd_cctx().compress(b)
+    else:
+        # level 1 is much faster than the default 6 and barely larger on recipe text
+        method = 'simulated'
+        comp = zlib.compress(b, 1)
+    out = {
+        'method': method,
         'orig_len': len(b),
         'compressed_len': len(comp)
     }
+    if raw:
+        out['compressed_blob'] = comp
+    else:
+        out['compressed_blob_b64'] = base64.b64encode(comp).decode('ascii')
+    return out
 
 
-def _simulate_decompress(b64: str) -> str:
-    comp = base64.b64decode(b64)
-    b = zlib.decompress(comp)
+def _simulate_decompress(comp: bytes, method: str = 'simulated') -> str:
+    if method == 'zstd':
+        b = _zstd_dctx().decompress(comp)
+    else:
+        b = zlib.decompress(comp)
     return b.decode('utf-8')
 
 
-def compress_text(text: str) -> Dict[str, Any]:
+def compress_text(text: str, raw: bool = False) -> Dict[str, Any]:
     """Compress `text` via ScaleDown API if configured, otherwise simulate.
 
-    Returns a dictionary with at least: method, compressed_blob_b64, orig_len, compressed_len
+    Returns a dictionary with at least: method, compressed_blob_b64, orig_len, compressed_len.
+    With raw=True the simulated path returns the bytes as `compressed_blob`
+    instead, skipping base64 (API responses are passed through unchanged).
     """
     if SCALEDOWN_API_URL and SCALEDOWN_API_KEY and requests is not None:
         headers = {'Authorization': f'Bearer {SCALEDOWN_API_KEY}'}
         try:
-            resp = requests.post(SCALEDOWN_API_URL, json={'text': text}, headers=headers, timeout=30)
+            resp = _SESSION.post(SCALEDOWN_API_URL, json={'text': text}, headers=headers, timeout=30)
             resp.raise_for_status()
             data = resp.json()
             # Normalize expected fields from real API if present
@@ -59,16 +126,23 @@ def compress_text(text: str) -> Dict[str, Any]:
         except Exception:
             # fall through to simulated
             pass
-    return _simulate_compress(text)
+    return _simulate_compress(text, raw=raw)
 
 
-def decompress_text(compressed_blob_b64: str, method: str = 'simulated') -> str:
-    """Decompress a blob produced by `compress_text`.
+def decompress_blob(blob: bytes, method: str = 'simulated') -> str:
+    """Decompress raw blob bytes, e.g. as read back from a compress_recipes shard.
 
-    If method='simulated' will zlib-decode; real API blobs may require API calls.
+    If method='simulated' will zlib-decode and method='zstd' will zstd-decode;
+    real API blobs may require API calls.
     """
-    if method == 'simulated':
-        return _simulate_decompress(compressed_blob_b64)
+    if method in ('simulated', 'zstd'):
+        if method == 'zstd' and zstd is None:
+            raise RuntimeError('zstandard is not installed')
+        return _simulate_decompress(blob, method)
     # If used with real API, you'd call the API's decompress endpoint here.
     raise NotImplementedError('Decompression for method=%s not implemented' % method)
 
+
+def decompress_text(compressed_blob_b64: str, method: str = 'simulated') -> str:
+    """Decompress a base64 blob produced by `compress_text`."""
+    return decompress_blob(base64.b64decode(compressed_blob_b64), method)
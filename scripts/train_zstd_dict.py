@@ -0,0 +1,32 @@
+"""Train the shared zstd dictionary used by the simulated compressor.
+
+Writes data/zstd_dict.bin; re-run compress_recipes.py afterwards so blobs
+are compressed against it.
+
+Usage:
+  python -m scripts.train_zstd_dict --in data/recipes.json --size 65536
+"""
+import argparse
+import orjson
+from pathlib import Path
+from scripts.compress_recipes import build_text_for_recipe
+from scripts.scaledown_client import train_zstd_dict, ZSTD_DICT_PATH
+
+
+def cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--in', dest='infile', default='data/recipes.json')
+    parser.add_argument('--out', default=str(ZSTD_DICT_PATH))
+    parser.add_argument('--size', type=int, default=65536)
+    parser.add_argument('--sample', type=int, default=0, help='limit number of recipes (0 = all)')
+    args = parser.parse_args()
+    with open(args.infile, 'rb') as f:
+        recipes = orjson.loads(f.read())
+    if args.sample:
+        recipes = recipes[:args.sample]
+    out = train_zstd_dict([build_text_for_recipe(r) for r in recipes], size=args.size, out_path=Path(args.out))
+    print('wrote', out)
+
+
+if __name__ == '__main__':
+    cli()